@@ -2,17 +2,35 @@
 
 import curses
 import configparser
+import functools
+import heapq
+import itertools
+import math
+import os
+import selectors
 import subprocess
 import threading
-import queue
+import re
 import time
 import signal
+import socket
+import struct
 import sys
 import textwrap
+from collections import deque, namedtuple
+from dataclasses import dataclass
 
 STOP_EVENT = threading.Event()  # Set when we want to stop all threads
 CHILD_PROCESSES = []            # Track all subprocess.Popen objects
 CTRL_C_TRIGGERED = False        # True if user pressed Ctrl+C
+LOG_HISTORY = 1000              # Lines kept per log pane
+FRAME_INTERVAL = 0.05           # Redraw the UI at most 20 times per second
+IDLE_TIMEOUT = 0.25             # Longest sleep in select() with nothing to do
+
+# Event kinds, i.e. which pane a line belongs to
+STATUS = "status"
+WFB = "wfb"
+TUNNEL = "tunnel"
 
 def handle_sigint(signum, frame):
     """Signal handler for Ctrl+C (SIGINT)."""
@@ -34,6 +52,10 @@ signal.signal(signal.SIGTERM, handle_sigterm)
 # --------------------------------------------------------------------------
 # Helper to parse the 64-bit WLAN ID into IP + indices
 # --------------------------------------------------------------------------
+# 4-byte IP, 3-byte wlan_idx, 1-byte antenna_idx (big-endian)
+_ANT_ID_STRUCT = struct.Struct(">4s3sB")
+
+@functools.lru_cache(maxsize=256)
 def parse_ant_field(wlan_id_hex: str) -> str:
     """
     Given a 64-bit hex string (e.g. '7f00000100000001'),
@@ -43,20 +65,15 @@ def parse_ant_field(wlan_id_hex: str) -> str:
        - last 1 byte => antenna_idx
 
     Returns e.g. "127.0.0.1_0_1" or fallback if parse fails.
+    The set of antenna IDs is tiny, so results are memoized.
     """
     if not wlan_id_hex:
         return "None"
     try:
-        val_64 = int(wlan_id_hex, 16)
-        ip_part = (val_64 >> 32) & 0xFFFFFFFF
-        wlan_idx = (val_64 >> 8) & 0xFFFFFF
-        antenna_idx = val_64 & 0xFF
-
-        # Convert ip_part to dotted-decimal
-        ip_address = ".".join(
-            str((ip_part >> (8 * i)) & 0xFF) for i in reversed(range(4))
-        )
-        return f"{ip_address}_{wlan_idx}_{antenna_idx}"
+        raw = bytes.fromhex(wlan_id_hex.rjust(16, "0"))
+        ip_raw, wlan_raw, antenna_idx = _ANT_ID_STRUCT.unpack(raw)
+        wlan_idx = int.from_bytes(wlan_raw, "big")
+        return f"{socket.inet_ntoa(ip_raw)}_{wlan_idx}_{antenna_idx}"
     except Exception:
         return wlan_id_hex
 
@@ -64,68 +81,175 @@ def parse_ant_field(wlan_id_hex: str) -> str:
 # Wrapping / Drawing Helpers
 # --------------------------------------------------------------------------
 
-def wrap_command(cmd_list, width):
+@functools.lru_cache(maxsize=32)
+def wrap_command(cmd_tuple, width):
     """
-    Given a list of command arguments, returns a list of wrapped lines
-    that fit within 'width' columns.
+    Given a tuple of command arguments, returns a tuple of wrapped lines
+    that fit within 'width' columns. Cached, so re-wrapping on every
+    terminal resize is only paid once per width.
     """
-    cmd_str = " ".join(cmd_list)
-    return textwrap.wrap(cmd_str, width=width)
+    cmd_str = " ".join(cmd_tuple)
+    return tuple(textwrap.wrap(cmd_str, width=width))
 
-def draw_window(win, header_lines, log_lines, max_height, max_width):
+def draw_rows(win, rows, prev_rows, max_height, max_width, top=0):
     """
-    Draws a window with:
-      - 'header_lines' at the top,
-      - Then the last portion of 'log_lines'.
+    Write 'rows' (a list of (text, attr)) inside the border of 'win',
+    starting 'top' rows below the border and touching only the rows that
+    differ from 'prev_rows' - the rows drawn last time, which is updated
+    in place. The border itself is drawn once when the window is created.
     """
-    win.erase()
-    win.border()
-
-    row = 1
-    # Print header lines first
-    for hline in header_lines:
-        if row >= max_height - 1:
-            break
-        win.addstr(row, 1, hline)
-        row += 1
-
-    # Print the last portion of log_lines
-    leftover_lines = max_height - 1 - row
-    slice_logs = log_lines[-leftover_lines:] if leftover_lines > 0 else []
-    for log_line in slice_logs:
-        if row >= max_height - 1:
-            break
-        win.addstr(row, 1, log_line)
-        row += 1
-
-    win.refresh()
+    inner_width = max_width - 2
+    rows = rows[:max(0, max_height - 2 - top)]
+
+    for i, row in enumerate(rows):
+        if i < len(prev_rows) and prev_rows[i] == row:
+            continue
+        text, attr = row
+        # Pad to the full width so stale text is overwritten without
+        # clrtoeol() wiping the right-hand border.
+        text = text.expandtabs().ljust(inner_width)
+        win.addnstr(top + i + 1, 1, text, inner_width, attr)
+
+    # Blank rows that were drawn last time but are gone now
+    for i in range(len(rows), len(prev_rows)):
+        win.addnstr(top + i + 1, 1, " " * inner_width, inner_width)
+
+    prev_rows[:] = rows
+    # Caller commits all panes with a single curses.doupdate()
+    win.noutrefresh()
+
+def format_status(entry):
+    """Status pane entries are (iface, text); iface is None for our own messages."""
+    iface, text = entry
+    if iface:
+        return f"[{iface}] {text}"
+    return text
+
+def draw_log(pane, log_lines, format_line=None):
+    """
+    Bring a log pane's pad up to date and blit it below the header.
+    pane["pending"] counts the lines appended to 'log_lines' since the
+    last call; only those are written (at most a screenful), after
+    scrolling the pad up to make room. Lines are passed through
+    'format_line' if given, so only lines that get drawn are formatted.
+    """
+    pad = pane["pad"]
+    new = min(pane["pending"], len(log_lines), pane["log_rows"])
+    pane["pending"] = 0
+    if pad is None:
+        return  # No room below the header at this terminal size
+
+    filled = pane["filled"]
+    new_filled = min(filled + new, pane["log_rows"])
+    shift = filled + new - new_filled
+    if shift >= filled:
+        # Nothing on screen survives: start over from the top
+        pad.erase()
+        y = 0
+        new = new_filled
+    else:
+        if shift:
+            pad.scroll(shift)
+        y = new_filled - new
+
+    inner_width = pane["width"] - 2
+    # Walk in from the end: islice() from the front would step over the
+    # whole history of the deque just to reach its last few lines.
+    tail = list(itertools.islice(reversed(log_lines), new))
+    tail.reverse()
+    for i, line in enumerate(tail):
+        if format_line is not None:
+            line = format_line(line)
+        pad.addnstr(y + i, 0, line.expandtabs(), inner_width)
+
+    pane["filled"] = new_filled
+    # Caller commits all panes with a single curses.doupdate()
+    pad.noutrefresh(0, 0, *pane["pad_box"])
 
 # --------------------------------------------------------------------------
 # Custom Parsing for Video Lines
 # --------------------------------------------------------------------------
 
+# Leading timestamp on a video stat line, e.g. "1736350123456\tRX_ANT\t..."
+_VIDEO_TS_RE = re.compile(r"\d+[ \t]+(?=(?:RX_ANT|PKT)(?:[ \t]|$))")
+
 def parse_video_line(raw_line: str) -> str:
     """
     For the "video" feed:
       - If the line begins (after optional timestamp) with "RX_ANT" or "PKT",
-        then remove the first numeric token if it exists,
+        then remove the leading numeric timestamp if it exists,
         and replace tabs with a single space.
       - Otherwise, just strip trailing newlines.
     """
     line = raw_line.rstrip('\r\n')
-    parts = line.split(None, 2)  # up to 3 chunks
-    if len(parts) < 2:
+    # Only stat lines carry a timestamp worth stripping; anything that
+    # doesn't start with a digit is left alone without running the regex.
+    if not line[:1].isdigit():
+        return line
+    m = _VIDEO_TS_RE.match(line)
+    if m is None:
         return line
+    return line[m.end():].replace('\t', ' ')
+
+# Matches the stat lines parse_video_line() leaves behind, e.g.
+#   RX_ANT 5805:3:20 7f00000100000001 664:-57:-53:-50:...
+#   PKT 112:262000:0:112:5:0:0:112:250800
+# PKT is p_all:b_all:p_dec_err:p_dec_ok:fec_rec:p_lost:p_bad:p_out:b_out;
+# a PKT line whose counters don't match still closes the RX_ANT interval.
+_WFB_STATS_RE = re.compile(
+    r"^RX_ANT[ \t]+(?P<freqchan>\S+)[ \t]+(?P<wlan_id>\S+)[ \t]+(?=\S)"
+    r"(?:[^:\s]*:[^:\s]*:(?P<avg>[^:\s]*))?"
+    r"|^PKT[ \t]+(?=\S)"
+    r"(?:\d+:(?P<b_all>\d+):\d+:\d+:(?P<fec_rec>\d+):(?P<p_lost>\d+):\d+:\d+:(?P<b_out>\d+)(?!\S))?",
+    re.MULTILINE
+)
 
-    if parts[1] in ["RX_ANT", "PKT"] and parts[0].isdigit():
-        # remove parts[0], then also replace tabs
-        if len(parts) == 3:
-            new_line = parts[1] + " " + parts[2]
+# A line _WFB_STATS_RE would take as a PKT record
+_PKT_LINE_RE = re.compile(r"PKT[ \t]+\S")
+
+def _scan_wfb_stats(lines):
+    """Run _WFB_STATS_RE over 'lines' and build the records, see parse_wfb_stats()."""
+    records = []
+    for m in _WFB_STATS_RE.finditer("\n".join(lines)):
+        if m["freqchan"] is not None:
+            try:
+                avg_rssi = float(m["avg"])
+            except (TypeError, ValueError):
+                avg_rssi = -9999.0
+            records.append(("RX_ANT", m["freqchan"], m["wlan_id"], avg_rssi))
+        elif m["b_all"] is not None:
+            pkt = (int(m["b_all"]), int(m["fec_rec"]), int(m["p_lost"]), int(m["b_out"]))
+            records.append(("PKT", pkt))
         else:
-            new_line = parts[1]
-        return new_line.replace('\t', ' ')
-    else:
-        return line
+            records.append(("PKT", None))
+    return records
+
+def parse_wfb_stats(lines):
+    """
+    Scan a batch of video log lines once and return its stat records,
+    in arrival order:
+      ("RX_ANT", freqchan, wlan_id_hex, avg_rssi)
+      ("PKT", (b_all, fec_rec, p_lost, b_outgoing))  or ("PKT", None)
+
+    Each PKT closes an RX_ANT interval, and only the last closed interval
+    is shown, so anything before the second-to-last PKT in the batch
+    would be replaced again within the same batch and isn't parsed.
+    """
+    start = 0
+    pkt_seen = 0
+    for i in range(len(lines) - 1, -1, -1):
+        if _PKT_LINE_RE.match(lines[i]):
+            pkt_seen += 1
+            if pkt_seen == 2:
+                start = i
+                break
+
+    records = _scan_wfb_stats(itertools.islice(lines, start, None))
+    # The counters come from the last PKT that parsed; if the tail had
+    # none, an earlier one in the batch may still be needed.
+    if start and not any(r[0] == "PKT" and r[1] is not None for r in records):
+        records = _scan_wfb_stats(lines)
+    return records
 
 def clean_line_keep_timestamp(line: str) -> str:
     """
@@ -151,6 +275,33 @@ def get_rssi_color(avg_rssi, color_pairs):
     else:
         return color_pairs["red"]
 
+def rssi_color_table(rssi_min, rssi_max, color_pairs):
+    """
+    get_rssi_color() for every whole dBm from below its lowest threshold
+    up to its highest (and across rssi_min..rssi_max), as (lowest, colors).
+    Anything past either end gets that end's color, same as the
+    thresholds would give.
+    """
+    lo = min(rssi_min, -71)
+    hi = max(rssi_max, -50)
+    return lo, tuple(get_rssi_color(v, color_pairs) for v in range(lo, hi + 1))
+
+@functools.lru_cache(maxsize=4)
+def bar_table(bar_count):
+    """
+    All bar strings from "" up to bar_count '#'s, built once so drawing a
+    bar is an index instead of a fresh "#" * n every frame.
+    """
+    return tuple("#" * n for n in range(bar_count + 1))
+
+@functools.lru_cache(maxsize=256)
+def format_mbit(label, rounded):
+    """
+    "<label>: 12.34 mbit/s" for a rate already passed through round(x, 2),
+    so a steady bitrate reuses the same row text from frame to frame.
+    """
+    return f"{label}: {rounded:.2f} mbit/s"
+
 def generate_ascii_bar(value, vmin, vmax, bar_count):
     """
     Generic helper to produce a bar string of '#' based on ratio.
@@ -162,61 +313,56 @@ def generate_ascii_bar(value, vmin, vmax, bar_count):
     val_clamped = max(vmin, min(value, vmax))
     scale = (val_clamped - vmin) / rng
     length = int(round(scale * bar_count))
-    return "#" * length
+    return bar_table(bar_count)[length]
 
-def build_rssi_chart_items(wfb_rxant_dict, rssi_min, rssi_max, bar_count, color_pairs):
+def build_rssi_chart_items(rxant_records, rssi_min, rssi_max, bar_count, color_pairs,
+                           max_items=None, rssi_colors=None):
     """
     Build a list of (line_str, color_attr) from the stored RX_ANT data.
 
-    We do:
-      - key format = freqchan_wlanid_count
-      - parse them out.
-      - use parse_ant_field(wlan_id_hex) to display a friendly version.
+    rxant_records holds one (freqchan, wlan_id_hex, line_no, avg_rssi)
+    tuple per RX_ANT line, already parsed when the line came in, so the
+    chart only has to sort and format them. With 'max_items', only the
+    first that many rows are built - the rest wouldn't fit on screen.
+    'rssi_colors' is a rssi_color_table() to reuse across frames.
     """
-    if not wfb_rxant_dict:
+    if not rxant_records:
         return [("No RX_ANT data yet...", color_pairs["red"])]
 
-    items = []
-    for composite_key, avg_rssi in wfb_rxant_dict.items():
-        # e.g. "5805:3:20_7f00000100000001_42"
-        parts = composite_key.split('_', 2)
-        if len(parts) == 3:
-            freqchan, wlan_id_hex, line_count_str = parts
-        elif len(parts) == 2:
-            freqchan, wlan_id_hex = parts
-            line_count_str = "0"
-        else:
-            freqchan = "?"
-            wlan_id_hex = composite_key
-            line_count_str = "0"
-
-        # interpret the wlan_id_hex as IP etc.
-        wlan_str = parse_ant_field(wlan_id_hex)
-
-        # if you want a group for sorting, you can do e.g. group = wlan_id_hex[:8]
-        # but we'll just keep it simple: sort by -avg_rssi
-        items.append((freqchan, wlan_str, line_count_str, avg_rssi))
-
-    # Sort by descending RSSI, or by freqchan ascending, etc. Let's do freqchan ascending, then -avg_rssi.
+    # Sort by freqchan ascending, then strongest antenna first.
     # freqchan as a string might do lexicographic sort, but it's usually "5805:3:40" or "5805:2:20", etc.
-    items.sort(key=lambda x: (x[0], -x[3]))
+    sort_key = lambda x: (x[0], -x[3])
+    if max_items is not None and max_items < len(rxant_records):
+        items = heapq.nsmallest(max_items, rxant_records, key=sort_key)
+    else:
+        items = sorted(rxant_records, key=sort_key)
 
-    lines = []
     rng = float(rssi_max - rssi_min)
     if rng < 1.0:
         rng = 1.0
+    scale_factor = bar_count / rng
+    bars = bar_table(bar_count)
+    if rssi_colors is None:
+        rssi_colors = rssi_color_table(rssi_min, rssi_max, color_pairs)
+    color_lo, colors = rssi_colors
+    color_last = len(colors) - 1
 
-    for (freqchan, wlan_str, line_count_str, avg_rssi) in items:
-        scale = (avg_rssi - rssi_min) / rng
-        scale = max(0.0, min(scale, 1.0))
-        bar_len = int(round(scale * bar_count))
-        bar_str = "#" * bar_len
+    lines = []
+    for (freqchan, wlan_id_hex, line_no, avg_rssi) in items:
+        clamped = max(0.0, min(avg_rssi - rssi_min, rng))
+        bar_len = int(round(clamped * scale_factor))
+        bar_str = bars[bar_len]
+
+        # interpret the wlan_id_hex as IP etc.
+        wlan_str = parse_ant_field(wlan_id_hex)
 
-        color_attr = get_rssi_color(avg_rssi, color_pairs)
+        # floor() keeps fractional averages on the same side of each threshold
+        color_idx = math.floor(avg_rssi) - color_lo
+        color_attr = colors[min(max(color_idx, 0), color_last)]
         line_str = (
         f"{freqchan:<12}"       # freqchan (left-justified, width=12)
         f"{wlan_str:<18}"       # parsed IP/antenna (left-justified, width=18)
-        f"[#{line_count_str:<3}]"   # line counter (left-justified, width=3 inside brackets)
+        f"[#{line_no:<3}]"      # line counter (left-justified, width=3 inside brackets)
         f": avg={int(avg_rssi):>4} " # 'avg=' plus RSSI (right-justified, width=4)
         f"| {bar_str}"
 )
@@ -224,10 +370,244 @@ def build_rssi_chart_items(wfb_rxant_dict, rssi_min, rssi_max, bar_count, color_
 
     return lines
 
+# --------------------------------------------------------------------------
+# Config / Command Building
+# --------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Cfg:
+    """Everything steam_wfb.py reads from config.cfg."""
+    daemon: bool
+    ip: str
+    port: str
+    region: str
+    rssi_min: int
+    rssi_max: int
+    retry_timeout: int
+    fec_rec_min: int
+    fec_rec_max: int
+    p_lost_min: int
+    p_lost_max: int
+    bar_count: int
+    rx_wlans: tuple
+    tx_wlans: tuple
+    tx_power: str
+    channel: str
+    bandwidth: str
+    video_key_path: str
+    tunnel_key_path: str
+    tunnel_bw: str
+    tunnel_stbc: str
+    tunnel_ldpc: str
+    tunnel_mcs: str
+    tunnel_fec_k: str
+    tunnel_fec_n: str
+    tunnel_fec_time: str
+    tunnel_agg_time: str
+    remote_injector: str
+    log_interval: str
+
+    @property
+    def tx_adapter(self):
+        """First tx_wlan, unless a remote injector takes over TX."""
+        if self.remote_injector or not self.tx_wlans:
+            return None
+        return self.tx_wlans[0]
+
+    @property
+    def enable_tunnel(self):
+        return self.tx_adapter is not None or self.remote_injector != ""
+
+Commands = namedtuple("Commands", ["video", "tunnel_rx", "tunnel_tx", "tunnel_tun"])
+
+def load_config(path="config.cfg"):
+    """
+    Parse config.cfg into a Cfg, applying the same fallbacks for
+    missing keys as always.
+    """
+    config = configparser.ConfigParser()
+    config.read(path)
+
+    video_key_path = config.get("common", "video_key_path", fallback="/etc/gs.key").strip()
+    tunnel_key_path = config.get("common", "tunnel_key_path", fallback="/etc/gs.key").strip()
+
+    return Cfg(
+        daemon=config.get("common", "daemon", fallback="false").strip().lower() == "true",
+        ip=config.get("common", "ip_address", fallback="192.168.1.49"),
+        port=config.get("common", "port", fallback="5600"),
+        region=config.get("common", "region", fallback="00"),
+        rssi_min=config.getint("common", "rssi_min", fallback=-80),
+        rssi_max=config.getint("common", "rssi_max", fallback=-20),
+        retry_timeout=config.getint("common", "wlan_retry_timeout", fallback=5),
+        fec_rec_min=config.getint("common", "fec_rec_min", fallback=0),
+        fec_rec_max=config.getint("common", "fec_rec_max", fallback=10),
+        p_lost_min=config.getint("common", "p_lost_min", fallback=0),
+        p_lost_max=config.getint("common", "p_lost_max", fallback=10),
+        bar_count=max(0, config.getint("common", "bar_count", fallback=35)),
+        rx_wlans=tuple(config.get("wlans", "rx_wlans", fallback="").split()),
+        tx_wlans=tuple(config.get("wlans", "tx_wlan", fallback="").split()),
+        tx_power=config.get("wlans", "tx_power", fallback="100"),
+        channel=config.get("wlans", "channel", fallback="161"),
+        bandwidth=config.get("wlans", "bandwidth", fallback="HT20"),
+        # Apply fallback if the value is empty after stripping
+        video_key_path=video_key_path or "/etc/gs.key",
+        tunnel_key_path=tunnel_key_path or "/etc/gs.key",
+        tunnel_bw=config.get("tunnel", "bandwidth", fallback="20"),
+        tunnel_stbc=config.get("tunnel", "stbc", fallback="1"),
+        tunnel_ldpc=config.get("tunnel", "ldpc", fallback="0"),
+        tunnel_mcs=config.get("tunnel", "mcs", fallback="1"),
+        tunnel_fec_k=config.get("tunnel", "fec_k", fallback="1"),
+        tunnel_fec_n=config.get("tunnel", "fec_n", fallback="2"),
+        tunnel_fec_time=config.get("tunnel", "fec_timeout", fallback="0"),
+        tunnel_agg_time=config.get("tunnel", "agg_timeout", fallback="5"),
+        remote_injector=config.get("tunnel", "remote_injector", fallback="").strip(),
+        log_interval=config.get("tunnel", "log_interval", fallback="2000"),
+    )
+
+def build_commands(cfg):
+    """
+    Assemble the wfb_rx / wfb_tx / wfb_tun command lines for 'cfg'.
+    The tunnel commands are None when the tunnel is disabled.
+    """
+    video = [
+        "./wfb_rx",
+        "-a", "10000",
+        "-p", "0",
+        "-c", cfg.ip,
+        "-u", cfg.port,
+        "-K", cfg.video_key_path,
+        "-R", "2097152",
+        "-l", str(cfg.log_interval),
+        "-i", "7669206"
+    ]
+    if not cfg.enable_tunnel:
+        return Commands(video, None, None, None)
+
+    default_injector = "127.0.0.1:11001"
+    final_injector = cfg.remote_injector or default_injector
+
+    tunnel_rx = [
+        "./wfb_rx",
+        "-a", "10001",
+        "-p", "32",
+        "-u", "54682",
+        "-K", cfg.tunnel_key_path,
+        "-R", "2097152",
+        "-l", str(cfg.log_interval),
+        "-i", "7669206"
+    ]
+    tunnel_tx = [
+        "./wfb_tx",
+        "-d",
+        "-f", "data",
+        "-p", "160",
+        "-u", "10002",
+        "-K", cfg.tunnel_key_path,
+        "-B", str(cfg.tunnel_bw),
+        "-G", "long",
+        "-S", str(cfg.tunnel_stbc),
+        "-L", str(cfg.tunnel_ldpc),
+        "-M", str(cfg.tunnel_mcs),
+        "-k", str(cfg.tunnel_fec_k),
+        "-n", str(cfg.tunnel_fec_n),
+        "-T", str(cfg.tunnel_fec_time),
+        "-F", "0",
+        "-i", "7669206",
+        "-R", "2097152",
+        "-l", str(cfg.log_interval),
+        "-C", "0",
+        final_injector
+    ]
+    tunnel_tun = [
+        "./wfb_tun",
+        "-a", "10.5.0.1/24",
+        "-l", "54682",
+        "-u", "10002",
+        "-T", str(cfg.tunnel_agg_time)
+    ]
+    return Commands(video, tunnel_rx, tunnel_tx, tunnel_tun)
+
+def get_mode(cfg, iface):
+    in_rx = iface in cfg.rx_wlans
+    is_tx = (iface == cfg.tx_adapter)
+    if in_rx and is_tx:
+        return "rx-tx"
+    elif in_rx:
+        return "rx"
+    elif is_tx:
+        return "tx"
+    return "unknown"
+
 # --------------------------------------------------------------------------
 # Worker Functions (stderr->stdout)
 # --------------------------------------------------------------------------
 
+class EventQueue:
+    """
+    (kind, iface, text) events for the main loop, posted from the wlan
+    workers and from start-up code. deque.append/popleft need no lock, and
+    every put writes a byte to a pipe that is registered with the main
+    loop's selector, so a sleeping select() wakes up as soon as an event
+    is posted.
+    """
+
+    def __init__(self, sel):
+        self.items = deque()
+        self.wake_r, self.wake_w = os.pipe()
+        os.set_blocking(self.wake_r, False)
+        os.set_blocking(self.wake_w, False)
+        # data=None tells read_streams() this is not a child stream
+        sel.register(self.wake_r, selectors.EVENT_READ, data=None)
+
+    def put(self, event):
+        self.items.append(event)
+        try:
+            os.write(self.wake_w, b"\0")
+        except BlockingIOError:
+            pass  # Pipe is full, so a wakeup is already pending
+
+    def wake_on_signals(self):
+        """
+        Have Python's signal handling write to the wakeup pipe too, so
+        SIGINT/SIGTERM (which set STOP_EVENT) end a select() right away.
+        Must be called from the main thread.
+        """
+        signal.set_wakeup_fd(self.wake_w, warn_on_full_buffer=False)
+
+    def drain(self):
+        """Yield everything posted so far, oldest first."""
+        # Clear the wakeup before popping: anything posted after this
+        # point leaves a byte behind and wakes the next select().
+        try:
+            os.read(self.wake_r, 4096)
+        except BlockingIOError:
+            pass
+        items = self.items
+        while items:
+            yield items.popleft()
+
+    def __bool__(self):
+        return bool(self.items)
+
+ALIVE_LOCK = threading.Lock()
+
+def start_worker(target, args, alive):
+    """
+    Run target(*args) on a daemon thread. alive[0] counts workers that
+    have not returned yet, so the UI loop can check for "all done"
+    without sweeping every thread.
+    """
+    def run():
+        try:
+            target(*args)
+        finally:
+            with ALIVE_LOCK:
+                alive[0] -= 1
+
+    with ALIVE_LOCK:
+        alive[0] += 1
+    threading.Thread(target=run, daemon=True).start()
+
 def wlan_worker(interface, tx_power, channel, region, bandwidth, mode,
                 event_queue, retry_timeout=5):
     """
@@ -238,13 +618,12 @@ def wlan_worker(interface, tx_power, channel, region, bandwidth, mode,
             cmd = f"./wlan_init.sh {interface} {tx_power} {channel} {region} {bandwidth} {mode}"
             command_list = ["bash", "-c", cmd]
 
-            event_queue.put(("status", f"[STARTING] WLAN: {interface} (mode={mode})"))
+            event_queue.put((STATUS, None, f"[STARTING] WLAN: {interface} (mode={mode})"))
 
             process = subprocess.Popen(
                 command_list,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True
+                stderr=subprocess.STDOUT
             )
             CHILD_PROCESSES.append(process)
 
@@ -252,305 +631,171 @@ def wlan_worker(interface, tx_power, channel, region, bandwidth, mode,
                 if STOP_EVENT.is_set():
                     process.terminate()
                     break
-                line = clean_line_keep_timestamp(raw_line)
+                line = clean_line_keep_timestamp(raw_line.decode("ascii", "replace"))
                 if line.strip():
-                    event_queue.put(("status", f"[{interface}] {line}"))
+                    event_queue.put((STATUS, interface, line))
 
             return_code = process.wait()
             if return_code == 0:
-                event_queue.put(("status", f"[COMPLETED] WLAN: {interface} (mode={mode})"))
+                event_queue.put((STATUS, None, f"[COMPLETED] WLAN: {interface} (mode={mode})"))
                 break
             else:
-                event_queue.put(("status", f"[FAILED/TERMINATED] WLAN: {interface} (mode={mode}), code {return_code}"))
+                event_queue.put((STATUS, None, f"[FAILED/TERMINATED] WLAN: {interface} (mode={mode}), code {return_code}"))
                 if STOP_EVENT.is_set():
                     break
-                event_queue.put(("status", f"[RETRY] Waiting {retry_timeout}s before retrying WLAN init: {interface}"))
+                event_queue.put((STATUS, None, f"[RETRY] Waiting {retry_timeout}s before retrying WLAN init: {interface}"))
                 time.sleep(retry_timeout)
 
         except Exception as e:
-            event_queue.put(("status", f"[ERROR] WLAN: {interface} (mode={mode}) - {str(e)}"))
+            event_queue.put((STATUS, None, f"[ERROR] WLAN: {interface} (mode={mode}) - {str(e)}"))
             if STOP_EVENT.is_set():
                 break
-            event_queue.put(("status", f"[RETRY] Exception. Wait {retry_timeout}s before retrying: {interface}"))
+            event_queue.put((STATUS, None, f"[RETRY] Exception. Wait {retry_timeout}s before retrying: {interface}"))
             time.sleep(retry_timeout)
 
-def wfb_rx_worker(command_list, event_queue, tag="wfb"):
+# --------------------------------------------------------------------------
+# Child Output Streams (non-blocking, read from the main loop)
+# --------------------------------------------------------------------------
+
+def start_stream(sel, command_list, event_queue, tag, clean_line, name=None):
     """
-    Worker for wfb_rx with merged stderr->stdout.
+    Launch command_list with merged stderr->stdout on a non-blocking pipe
+    and register it with the selector 'sel'. Output is picked up by
+    read_streams() from the main loop, so no reader thread is needed.
     """
+    name = name or command_list[0]
     try:
-        event_queue.put((tag, f"[STARTING] {command_list[0]} (tag={tag})"))
+        event_queue.put((tag, None, f"[STARTING] {name} (tag={tag})"))
 
         process = subprocess.Popen(
             command_list,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
-            text=True
+            bufsize=0
         )
         CHILD_PROCESSES.append(process)
 
-        for raw_line in process.stdout:
-            if STOP_EVENT.is_set():
-                process.terminate()
-                break
-            if tag == "wfb":
-                line = parse_video_line(raw_line)
-            else:
-                line = clean_line_keep_timestamp(raw_line)
-
-            if line.strip():
-                event_queue.put((tag, line))
-
-        return_code = process.wait()
-        if return_code == 0:
-            event_queue.put((tag, f"[COMPLETED] {command_list[0]}"))
-        else:
-            event_queue.put((tag, f"[FAILED/TERMINATED] {command_list[0]}, code {return_code}"))
+        os.set_blocking(process.stdout.fileno(), False)
+        stream = {
+            "tag": tag,
+            "name": name,
+            "process": process,
+            "clean_line": clean_line,
+            "buf": bytearray(),
+        }
+        sel.register(process.stdout, selectors.EVENT_READ, data=stream)
 
     except Exception as e:
-        event_queue.put((tag, f"[ERROR] {command_list[0]}: {str(e)}"))
+        event_queue.put((tag, None, f"[ERROR] {name}: {str(e)}"))
 
-def wfb_tx_worker(command_list, event_queue, tag="tunnel"):
+def read_streams(sel, timeout):
     """
-    Worker for wfb_tx with merged stderr->stdout.
+    Wait up to 'timeout' seconds for child output and return the complete
+    lines that arrived, as (tag, line) pairs. A stream that hits EOF is
+    unregistered and reaped, and reports COMPLETED/FAILED like the old
+    per-process workers did.
     """
-    try:
-        event_queue.put((tag, f"[STARTING] {command_list[0]} (tag={tag})"))
-
-        process = subprocess.Popen(
-            command_list,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True
-        )
-        CHILD_PROCESSES.append(process)
-
-        for raw_line in process.stdout:
-            if STOP_EVENT.is_set():
-                process.terminate()
-                break
-            line = clean_line_keep_timestamp(raw_line)
+    events = []
+    for key, _ in sel.select(timeout):
+        stream = key.data
+        if stream is None:
+            continue  # Wakeup pipe or terminal input, handled by the caller
+        buf = stream["buf"]
+        try:
+            chunk = os.read(key.fd, 65536)
+        except BlockingIOError:
+            continue
+
+        # The wfb tools only print ASCII, so decode every complete line in
+        # the chunk with one cheap ascii decode rather than one per line.
+        if chunk:
+            buf += chunk
+            end = buf.rfind(b"\n")
+            if end < 0:
+                continue
+            raw_lines = buf[:end].decode("ascii", "replace").split("\n")
+            del buf[:end + 1]
+        else:
+            # EOF: flush an unterminated last line, then reap the child
+            raw_lines = [buf.decode("ascii", "replace")] if buf else []
+            buf.clear()
+
+        tag = stream["tag"]
+        clean_line = stream["clean_line"]
+        for raw in raw_lines:
+            line = clean_line(raw)
             if line.strip():
-                event_queue.put((tag, line))
+                events.append((tag, line))
 
-        return_code = process.wait()
-        if return_code == 0:
-            event_queue.put((tag, f"[COMPLETED] {command_list[0]}"))
-        else:
-            event_queue.put((tag, f"[FAILED/TERMINATED] {command_list[0]}, code {return_code}"))
+        if not chunk:
+            sel.unregister(key.fileobj)
+            key.fileobj.close()
+            return_code = stream["process"].wait()
+            if return_code == 0:
+                events.append((tag, f"[COMPLETED] {stream['name']}"))
+            else:
+                events.append((tag, f"[FAILED/TERMINATED] {stream['name']}, code {return_code}"))
 
-    except Exception as e:
-        event_queue.put((tag, f"[ERROR] {command_list[0]}: {str(e)}"))
+    return events
 
-def wfb_tun_worker(command_list, event_queue):
+def streams_open(sel):
+    """True while any child stream is still registered with 'sel'."""
+    return any(key.data is not None for key in sel.get_map().values())
+
+def start_children(cfg, cmds, event_queue, sel, alive):
     """
-    Worker for wfb_tun with merged stderr->stdout.
+    Kick off wlan_init.sh for every interface in use, then the video
+    stream and (if enabled) the tunnel streams.
     """
-    try:
-        event_queue.put(("tunnel", "[STARTING] wfb_tun"))
+    if cfg.remote_injector:
+        event_queue.put((STATUS, None, "[INFO] remote_injector => ignoring tx_wlan"))
+    elif cfg.tx_adapter:
+        event_queue.put((STATUS, None, f"[INFO] Using TX adapter => {cfg.tx_adapter}"))
 
-        process = subprocess.Popen(
-            command_list,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True
-        )
-        CHILD_PROCESSES.append(process)
+    all_ifaces = set(cfg.rx_wlans)
+    if cfg.tx_adapter:
+        all_ifaces.add(cfg.tx_adapter)
 
-        for raw_line in process.stdout:
-            if STOP_EVENT.is_set():
-                process.terminate()
-                break
-            line = clean_line_keep_timestamp(raw_line)
-            if line.strip():
-                event_queue.put(("tunnel", line))
+    for iface in all_ifaces:
+        iface = sys.intern(iface)  # Sent along with every line it prints
+        mode = get_mode(cfg, iface)
+        start_worker(
+            wlan_worker,
+            (iface, cfg.tx_power, cfg.channel, cfg.region, cfg.bandwidth, mode,
+             event_queue, cfg.retry_timeout),
+            alive
+        )
 
-        return_code = process.wait()
-        if return_code == 0:
-            event_queue.put(("tunnel", "[COMPLETED] wfb_tun"))
-        else:
-            event_queue.put(("tunnel", f"[FAILED/TERMINATED] wfb_tun, code {return_code}"))
+    start_stream(sel, cmds.video, event_queue, WFB, parse_video_line)
 
-    except Exception as e:
-        event_queue.put(("tunnel", f"[ERROR] wfb_tun: {str(e)}"))
+    if cfg.enable_tunnel:
+        start_stream(sel, cmds.tunnel_rx, event_queue, TUNNEL, clean_line_keep_timestamp)
+        start_stream(sel, cmds.tunnel_tx, event_queue, TUNNEL, clean_line_keep_timestamp)
+        start_stream(sel, cmds.tunnel_tun, event_queue, TUNNEL, clean_line_keep_timestamp,
+                     name="wfb_tun")
+    else:
+        event_queue.put((TUNNEL, None, "[TUNNEL DISABLED] No local TX adapter or remote_injector."))
 
 # --------------------------------------------------------------------------
 # Daemon Mode
 # --------------------------------------------------------------------------
 
-def daemon_main():
+def daemon_main(cfg):
     """
-    This version does NOT use ncurses. Just read config, spawn threads,
-    and pipe logs to stdout until done.
+    This version does NOT use ncurses. Just spawn the children from the
+    parsed config and pipe logs to stdout until done.
     """
-    import configparser
+    cmds = build_commands(cfg)
 
-    config = configparser.ConfigParser()
-    config.read("config.cfg")
-
-    ip = config.get("common", "ip_address", fallback="192.168.1.49")
-    port = config.get("common", "port", fallback="5600")
-    region = config.get("common", "region", fallback="00")
-    rssi_min = config.getint("common", "rssi_min", fallback=-80)
-    rssi_max = config.getint("common", "rssi_max", fallback=-20)
-    retry_timeout = config.getint("common", "wlan_retry_timeout", fallback=5)
-
-    rx_wlans_str = config.get("wlans", "rx_wlans", fallback="").strip()
-    tx_wlans_str = config.get("wlans", "tx_wlan",  fallback="").strip()
-    tx_power     = config.get("wlans", "tx_power", fallback="100")
-    channel      = config.get("wlans", "channel",  fallback="161")
-    bandwidth    = config.get("wlans", "bandwidth",fallback="HT20")
-    video_key_path = config.get("common", "video_key_path", fallback="/etc/gs.key").strip()
-    tunnel_key_path = config.get("common", "tunnel_key_path", fallback="/etc/gs.key").strip()
-    # Apply fallback if the value is empty after stripping
-    if not video_key_path:
-        video_key_path = "/etc/gs.key"
-    if not tunnel_key_path:
-        tunnel_key_path = "/etc/gs.key"
-
-
-    tunnel_bw       = config.get("tunnel", "bandwidth", fallback="20")
-    tunnel_stbc     = config.get("tunnel", "stbc", fallback="1")
-    tunnel_ldpc     = config.get("tunnel", "ldpc", fallback="0")
-    tunnel_mcs      = config.get("tunnel", "mcs", fallback="1")
-    tunnel_fec_k    = config.get("tunnel", "fec_k", fallback="1")
-    tunnel_fec_n    = config.get("tunnel", "fec_n", fallback="2")
-    tunnel_fec_time = config.get("tunnel", "fec_timeout", fallback="0")
-    tunnel_agg_time = config.get("tunnel", "agg_timeout", fallback="5")
-    remote_injector = config.get("tunnel", "remote_injector", fallback="")
-    log_interval    = config.get("tunnel", "log_interval", fallback="2000")
-
-    rx_wlans = rx_wlans_str.split() if rx_wlans_str else []
-    all_tx_wlans = tx_wlans_str.split() if tx_wlans_str else []
-
-    event_queue = queue.Queue()
-    threads = []
+    alive = [0]  # Workers still running, see start_worker()
+    sel = selectors.DefaultSelector()
+    event_queue = EventQueue(sel)
+    event_queue.wake_on_signals()
 
     print("[STATUS] Daemon mode active.")
-    print(f"[STATUS] rx_wlans={rx_wlans}, tx_wlans={all_tx_wlans}, remote_injector='{remote_injector}'")
+    print(f"[STATUS] rx_wlans={list(cfg.rx_wlans)}, tx_wlans={list(cfg.tx_wlans)}, remote_injector='{cfg.remote_injector}'")
 
-    tx_adapter = None
-    if remote_injector.strip():
-        print("[STATUS] remote_injector => ignoring tx_wlan")
-    else:
-        if len(all_tx_wlans) > 0:
-            tx_adapter = all_tx_wlans[0]
-            print(f"[STATUS] Using TX adapter => {tx_adapter}")
-
-    all_ifaces = set(rx_wlans)
-    if tx_adapter:
-        all_ifaces.add(tx_adapter)
-
-    def get_mode(iface):
-        in_rx = iface in rx_wlans
-        is_tx = (iface == tx_adapter)
-        if in_rx and is_tx:
-            return "rx-tx"
-        elif in_rx:
-            return "rx"
-        elif is_tx:
-            return "tx"
-        return "unknown"
-
-    for iface in all_ifaces:
-        mode = get_mode(iface)
-        t = threading.Thread(
-            target=wlan_worker,
-            args=(iface, tx_power, channel, region, bandwidth, mode, event_queue, retry_timeout),
-            daemon=True
-        )
-        t.start()
-        threads.append(t)
-
-    wfb_video_cmd = [
-        "./wfb_rx",
-        "-a", "10000",
-        "-p", "0",
-        "-c", ip,
-        "-u", port,
-        "-K", video_key_path,
-        "-R", "2097152",
-        "-l", str(log_interval),
-        "-i", "7669206"
-    ]
-    wfb_video_thread = threading.Thread(
-        target=wfb_rx_worker,
-        args=(wfb_video_cmd, event_queue, "wfb"),
-        daemon=True
-    )
-    wfb_video_thread.start()
-    threads.append(wfb_video_thread)
-
-    enable_tunnel = (tx_adapter is not None or remote_injector.strip() != "")
-    if enable_tunnel:
-        default_injector = "127.0.0.1:11001"
-        final_injector = remote_injector.strip() if remote_injector.strip() else default_injector
-
-        tunnel_rx_cmd = [
-            "./wfb_rx",
-            "-a", "10001",
-            "-p", "32",
-            "-u", "54682",
-            "-K", tunnel_key_path,
-            "-R", "2097152",
-            "-l", str(log_interval),
-            "-i", "7669206"
-        ]
-        tunnel_tx_cmd = [
-            "./wfb_tx",
-            "-d",
-            "-f", "data",
-            "-p", "160",
-            "-u", "10002",
-            "-K", tunnel_key_path,
-            "-B", str(tunnel_bw),
-            "-G", "long",
-            "-S", str(tunnel_stbc),
-            "-L", str(tunnel_ldpc),
-            "-M", str(tunnel_mcs),
-            "-k", str(tunnel_fec_k),
-            "-n", str(tunnel_fec_n),
-            "-T", str(tunnel_fec_time),
-            "-F", "0",
-            "-i", "7669206",
-            "-R", "2097152",
-            "-l", str(log_interval),
-            "-C", "0",
-            final_injector
-        ]
-        tunnel_tun_cmd = [
-            "./wfb_tun",
-            "-a", "10.5.0.1/24",
-            "-l", "54682",
-            "-u", "10002",
-            "-T", str(tunnel_agg_time)
-        ]
-
-        t_rx = threading.Thread(
-            target=wfb_rx_worker,
-            args=(tunnel_rx_cmd, event_queue, "tunnel"),
-            daemon=True
-        )
-        t_rx.start()
-        threads.append(t_rx)
-
-        t_tx = threading.Thread(
-            target=wfb_tx_worker,
-            args=(tunnel_tx_cmd, event_queue, "tunnel"),
-            daemon=True
-        )
-        t_tx.start()
-        threads.append(t_tx)
-
-        t_tun = threading.Thread(
-            target=wfb_tun_worker,
-            args=(tunnel_tun_cmd, event_queue),
-            daemon=True
-        )
-        t_tun.start()
-        threads.append(t_tun)
-    else:
-        event_queue.put(("tunnel", "[TUNNEL DISABLED] No local TX adapter or remote_injector."))
+    start_children(cfg, cmds, event_queue, sel, alive)
 
     # Main loop
     while True:
@@ -559,18 +804,19 @@ def daemon_main():
                 if proc.poll() is None:
                     proc.terminate()
             break
-        alive_threads = any(t.is_alive() for t in threads)
+        alive_threads = alive[0] > 0
 
-        while True:
-            try:
-                k, txt = event_queue.get_nowait()
-            except queue.Empty:
-                break
+        for k, iface, txt in event_queue.drain():
+            if iface:
+                txt = f"[{iface}] {txt}"
+            print(f"[{k.upper()}] {txt}")
+
+        # Sleeps until a child prints, a worker posts or a signal arrives
+        for k, txt in read_streams(sel, IDLE_TIMEOUT):
             print(f"[{k.upper()}] {txt}")
 
-        if not alive_threads and event_queue.empty():
+        if not alive_threads and not streams_open(sel) and not event_queue:
             break
-        time.sleep(0.1)
 
     print("[STATUS] Final cleanup (daemon mode)")
     try:
@@ -586,7 +832,7 @@ def daemon_main():
 # ncurses Main (Interactive Mode)
 # --------------------------------------------------------------------------
 
-def ncurses_main(stdscr):
+def ncurses_main(stdscr, cfg):
     curses.start_color()
     curses.use_default_colors()
 
@@ -601,61 +847,21 @@ def ncurses_main(stdscr):
         "magenta": curses.color_pair(3),
         "red": curses.color_pair(4),
     }
+    rssi_colors = rssi_color_table(cfg.rssi_min, cfg.rssi_max, color_pairs)
 
-    import configparser
-    config = configparser.ConfigParser()
-    config.read("config.cfg")
-
-    ip = config.get("common", "ip_address", fallback="192.168.1.49")
-    port = config.get("common", "port", fallback="5600")
-    region = config.get("common", "region", fallback="00")
-    rssi_min = config.getint("common", "rssi_min", fallback=-80)
-    rssi_max = config.getint("common", "rssi_max", fallback=-20)
-    retry_timeout = config.getint("common", "wlan_retry_timeout", fallback=5)
-
-    fec_rec_min  = config.getint("common", "fec_rec_min", fallback=0)
-    fec_rec_max  = config.getint("common", "fec_rec_max", fallback=10)
-    p_lost_min   = config.getint("common", "p_lost_min",  fallback=0)
-    p_lost_max   = config.getint("common", "p_lost_max",  fallback=10)
-    bar_count    = config.getint("common", "bar_count",   fallback=35)
-
-    rx_wlans_str = config.get("wlans", "rx_wlans", fallback="").strip()
-    tx_wlans_str = config.get("wlans", "tx_wlan",  fallback="").strip()
-    tx_power     = config.get("wlans", "tx_power", fallback="100")
-    channel      = config.get("wlans", "channel",  fallback="161")
-    bandwidth    = config.get("wlans", "bandwidth",fallback="HT20")
-    video_key_path = config.get("common", "video_key_path", fallback="/etc/gs.key").strip()
-    tunnel_key_path = config.get("common", "tunnel_key_path", fallback="/etc/gs.key").strip()
-    
-    # Apply fallback if the value is empty after stripping
-    if not video_key_path:
-        video_key_path = "/etc/gs.key"
-    if not tunnel_key_path:
-        tunnel_key_path = "/etc/gs.key"
-
-    tunnel_bw       = config.get("tunnel", "bandwidth", fallback="20")
-    tunnel_stbc     = config.get("tunnel", "stbc", fallback="1")
-    tunnel_ldpc     = config.get("tunnel", "ldpc", fallback="0")
-    tunnel_mcs      = config.get("tunnel", "mcs", fallback="1")
-    tunnel_fec_k    = config.get("tunnel", "fec_k", fallback="1")
-    tunnel_fec_n    = config.get("tunnel", "fec_n", fallback="2")
-    tunnel_fec_time = config.get("tunnel", "fec_timeout", fallback="0")
-    tunnel_agg_time = config.get("tunnel", "agg_timeout", fallback="5")
-    remote_injector = config.get("tunnel", "remote_injector", fallback="")
-    log_interval_ms = config.get("tunnel", "log_interval", fallback="2000")
-
-    rx_wlans = rx_wlans_str.split() if rx_wlans_str else []
-    all_tx_wlans = tx_wlans_str.split() if tx_wlans_str else []
-
-    event_queue = queue.Queue()
-    threads = []
-
-    # We'll keep a line counter for each RX_ANT so we can always produce unique keys
-    rxant_line_counter = 0
-
-    # We store lines from last PKT in "display", new ones in "current"
-    wfb_rxant_dict_current = {}
-    wfb_rxant_dict_display = {}
+    cmds = build_commands(cfg)
+
+    alive = [0]  # Workers still running, see start_worker()
+    sel = selectors.DefaultSelector()
+    event_queue = EventQueue(sel)
+    event_queue.wake_on_signals()
+    # Key presses wake the loop as well; getch() below reads them
+    sel.register(sys.stdin.fileno(), selectors.EVENT_READ, data=None)
+
+    # RX_ANT records since the last PKT go in "current"; the ones from
+    # the last completed interval are in "display"
+    wfb_rxant_current = []
+    wfb_rxant_display = []
 
     last_pkt_data = {
         "fec_rec": 0,
@@ -666,183 +872,87 @@ def ncurses_main(stdscr):
     bitrate_all = 0.0
     bitrate_out = 0.0
 
-    status_logs = []
-    wfb_logs = []
-    tunnel_logs = []
-
-    def get_mode(iface):
-        in_rx = iface in rx_wlans
-        is_tx = (iface == tx_adapter)
-        if in_rx and is_tx:
-            return "rx-tx"
-        elif in_rx:
-            return "rx"
-        elif is_tx:
-            return "tx"
-        return "unknown"
-
-    tx_adapter = None
-    if remote_injector.strip():
-        event_queue.put(("status", "[INFO] remote_injector => ignoring tx_wlan"))
-    else:
-        if len(all_tx_wlans) > 0:
-            tx_adapter = all_tx_wlans[0]
-            event_queue.put(("status", f"[INFO] Using TX adapter => {tx_adapter}"))
-
-    all_ifaces = set(rx_wlans)
-    if tx_adapter:
-        all_ifaces.add(tx_adapter)
-
-    for iface in all_ifaces:
-        mode = get_mode(iface)
-        t = threading.Thread(
-            target=wlan_worker,
-            args=(iface, tx_power, channel, region, bandwidth, mode, event_queue, retry_timeout),
-            daemon=True
-        )
-        t.start()
-        threads.append(t)
-
-    wfb_video_cmd = [
-        "./wfb_rx",
-        "-a", "10000",
-        "-p", "0",
-        "-c", ip,
-        "-u", port,
-        "-K", video_key_path,
-        "-R", "2097152",
-        "-l", str(log_interval_ms),
-        "-i", "7669206"
-    ]
-    wfb_video_thread = threading.Thread(
-        target=wfb_rx_worker,
-        args=(wfb_video_cmd, event_queue, "wfb"),
-        daemon=True
-    )
-    wfb_video_thread.start()
-    threads.append(wfb_video_thread)
-
-    enable_tunnel = (tx_adapter is not None or remote_injector.strip() != "")
-    if enable_tunnel:
-        default_injector = "127.0.0.1:11001"
-        final_injector = remote_injector.strip() if remote_injector.strip() else default_injector
-
-        tunnel_rx_cmd = [
-            "./wfb_rx",
-            "-a", "10001",
-            "-p", "32",
-            "-u", "54682",
-            "-K", tunnel_key_path,
-            "-R", "2097152",
-            "-l", str(log_interval_ms),
-            "-i", "7669206"
-        ]
-        tunnel_tx_cmd = [
-            "./wfb_tx",
-            "-d",
-            "-f", "data",
-            "-p", "160",
-            "-u", "10002",
-            "-K", tunnel_key_path,
-            "-B", str(tunnel_bw),
-            "-G", "long",
-            "-S", str(tunnel_stbc),
-            "-L", str(tunnel_ldpc),
-            "-M", str(tunnel_mcs),
-            "-k", str(tunnel_fec_k),
-            "-n", str(tunnel_fec_n),
-            "-T", str(tunnel_fec_time),
-            "-F", "0",
-            "-i", "7669206",
-            "-R", "2097152",
-            "-l", str(log_interval_ms),
-            "-C", "0",
-            final_injector
-        ]
-        tunnel_tun_cmd = [
-            "./wfb_tun",
-            "-a", "10.5.0.1/24",
-            "-l", "54682",
-            "-u", "10002",
-            "-T", str(tunnel_agg_time)
-        ]
-
-        t_rx = threading.Thread(
-            target=wfb_rx_worker,
-            args=(tunnel_rx_cmd, event_queue, "tunnel"),
-            daemon=True
-        )
-        t_rx.start()
-        threads.append(t_rx)
-
-        t_tx = threading.Thread(
-            target=wfb_tx_worker,
-            args=(tunnel_tx_cmd, event_queue, "tunnel"),
-            daemon=True
-        )
-        t_tx.start()
-        threads.append(t_tx)
-
-        t_tun = threading.Thread(
-            target=wfb_tun_worker,
-            args=(tunnel_tun_cmd, event_queue),
-            daemon=True
-        )
-        t_tun.start()
-        threads.append(t_tun)
-    else:
-        event_queue.put(("tunnel", "[TUNNEL DISABLED] No local TX adapter or remote_injector."))
+    # Bounded buffers: appends past LOG_HISTORY drop the oldest line
+    status_logs = deque(maxlen=LOG_HISTORY)
+    wfb_logs = deque(maxlen=LOG_HISTORY)
+    tunnel_logs = deque(maxlen=LOG_HISTORY)
+
+    start_children(cfg, cmds, event_queue, sel, alive)
+
+    def layout():
+        """
+        (Re)build the four panes for the current terminal size.
+        Each pane is a dict holding its window, size and header lines.
+        """
+        height, width = stdscr.getmaxyx()
+
+        half_height = height // 2
+        bottom_height = height - half_height
+        left_width = width // 2
+        right_width = width - left_width
+
+        def make_pane(rows, cols, top, left, header, log=False):
+            # Output only: input is read from stdscr, scrolling happens
+            # in the log pads
+            win = curses.newwin(rows, cols, top, left)
+            win.border()
+            # Headers are static: draw them now, panes only redraw below them
+            draw_rows(win, [(hl, 0) for hl in header], [], rows, cols)
+            pane = {"win": win, "height": rows, "width": cols, "header": header,
+                    "prev_rows": []}
+            if log:
+                # Log lines live in a pad covering the area under the
+                # header, see draw_log(). It has one spare column so a
+                # full-width line never wraps and scrolls the pad.
+                log_rows = rows - 2 - len(header)
+                pad = None
+                if log_rows > 0:
+                    pad = curses.newpad(log_rows, cols - 1)
+                    pad.scrollok(True)
+                pane.update({
+                    "pad": pad,
+                    "log_rows": log_rows,
+                    "pad_box": (top + 1 + len(header), left + 1,
+                                top + rows - 2, left + cols - 2),
+                    "filled": 0,
+                    "pending": max(log_rows, 0),  # Refill from the log tail
+                })
+            return pane
+
+        wfb_header_lines = ["[VIDEO RX COMMAND]:"]
+        wfb_header_lines += wrap_command(tuple(cmds.video), left_width - 2)
+
+        tunnel_header_lines = ["[TUNNEL RX COMMAND]:"]
+        if cfg.enable_tunnel:
+            tunnel_header_lines += wrap_command(tuple(cmds.tunnel_rx), right_width - 2)
+            tunnel_header_lines.append("[TUNNEL TX COMMAND]:")
+            tunnel_header_lines += wrap_command(tuple(cmds.tunnel_tx), right_width - 2)
+            tunnel_header_lines.append("[TUNNEL TUN COMMAND]:")
+            tunnel_header_lines += wrap_command(tuple(cmds.tunnel_tun), right_width - 2)
+        else:
+            tunnel_header_lines.append("tunnel disabled")
+
+        return {
+            "status": make_pane(half_height, left_width, 0, 0, [], log=True),
+            "stats": make_pane(half_height, right_width, 0, left_width,
+                               ["[ASCII RSSI Chart (last interval)]"]),
+            "wfb": make_pane(bottom_height, left_width, half_height, 0,
+                             wfb_header_lines, log=True),
+            "tunnel": make_pane(bottom_height, right_width, half_height, left_width,
+                                tunnel_header_lines, log=True),
+        }
 
     # Prepare curses
     stdscr.clear()
-    height, width = stdscr.getmaxyx()
-
-    half_height = height // 2
-    top_left_width = width // 2
-    top_right_width = width - top_left_width
-
-    status_win = curses.newwin(half_height, top_left_width, 0, 0)
-    status_win.nodelay(True)
-    status_win.scrollok(True)
-
-    stats_win = curses.newwin(half_height, top_right_width, 0, top_left_width)
-    stats_win.nodelay(True)
-    stats_win.scrollok(True)
-
-    bottom_height = height - half_height
-    wfb_width = width // 2
-    wfb_win = curses.newwin(bottom_height, wfb_width, half_height, 0)
-    wfb_win.nodelay(True)
-    wfb_win.scrollok(True)
-
-    tunnel_width = width - wfb_width
-    tunnel_win = curses.newwin(bottom_height, tunnel_width, half_height, wfb_width)
-    tunnel_win.nodelay(True)
-    tunnel_win.scrollok(True)
-
-    MAX_STATUS_LINES = half_height - 2
-    MAX_STATS_LINES  = half_height - 2
-    MAX_WFB_LINES    = bottom_height - 2
-    MAX_TUNNEL_LINES = bottom_height - 2
-
+    stdscr.noutrefresh()  # Flush the clear before the panes draw their headers
     curses.curs_set(0)
     stdscr.nodelay(True)
+    panes = layout()
 
-    stats_header = ["[ASCII RSSI Chart (last interval)]"]
-    wfb_header_lines = ["[VIDEO RX COMMAND]:"]
-    wfb_header_lines += wrap_command(wfb_video_cmd, wfb_width - 2)
-
-    tunnel_header_lines = ["[TUNNEL RX COMMAND]:"]
-    if enable_tunnel:
-        tunnel_header_lines += wrap_command(tunnel_rx_cmd, tunnel_width - 2)
-        tunnel_header_lines.append("[TUNNEL TX COMMAND]:")
-        tunnel_header_lines += wrap_command(tunnel_tx_cmd, tunnel_width - 2)
-        tunnel_header_lines.append("[TUNNEL TUN COMMAND]:")
-        tunnel_header_lines += wrap_command(tunnel_tun_cmd, tunnel_width - 2)
-    else:
-        tunnel_header_lines.append("tunnel disabled")
-
-    status_header = []
+    # Panes only get redrawn when something they show has changed.
+    # Everything starts dirty so the first frame paints all four.
+    dirty = {"status": True, "stats": True, "wfb": True, "tunnel": True}
+    next_frame = time.monotonic()
 
     # Main UI loop
     while True:
@@ -852,175 +962,157 @@ def ncurses_main(stdscr):
                     proc.terminate()
             break
 
-        alive_threads = any(t.is_alive() for t in threads)
-
-        while True:
-            try:
-                kind, text = event_queue.get_nowait()
-            except queue.Empty:
-                break
+        alive_threads = alive[0] > 0
+
+        # Rebuild the layout when the terminal is resized
+        resized = False
+        key = stdscr.getch()
+        while key != -1:
+            if key == curses.KEY_RESIZE:
+                resized = True
+            key = stdscr.getch()
+        if resized:
+            curses.update_lines_cols()
+            stdscr.clear()
+            stdscr.noutrefresh()
+            panes = layout()
+            for name in dirty:
+                dirty[name] = True
+
+        # Sort this drain's events per pane, then hand each pane its lines
+        # in one extend instead of an append per line.
+        s_batch = []
+        w_batch = []
+        t_batch = []
+        batches = {STATUS: s_batch, WFB: w_batch, TUNNEL: t_batch}
+
+        # wlan_init workers and stream start-up messages come through the
+        # queue. Status lines keep their interface alongside and only get
+        # the "[iface] " prefix if they are drawn, see format_status().
+        for kind, iface, text in event_queue.drain():
+            if kind == STATUS:
+                s_batch.append((iface, text))
+            else:
+                batches[kind].append(text)
+
+        # Child output; sleeps in select until something arrives, but
+        # wakes in time to draw a frame that is already pending. ncurses
+        # handles SIGWINCH itself, so IDLE_TIMEOUT also bounds how long a
+        # terminal resize waits to be noticed.
+        timeout = IDLE_TIMEOUT
+        if any(dirty.values()):
+            timeout = max(0.0, next_frame - time.monotonic())
+        for kind, text in read_streams(sel, timeout):
+            batches[kind].append(text)
+
+        if s_batch:
+            status_logs.extend(s_batch)
+            panes["status"]["pending"] += len(s_batch)
+            dirty["status"] = True
+        if w_batch:
+            wfb_logs.extend(w_batch)
+            panes["wfb"]["pending"] += len(w_batch)
+            dirty["wfb"] = True
+        if t_batch:
+            tunnel_logs.extend(t_batch)
+            panes["tunnel"]["pending"] += len(t_batch)
+            dirty["tunnel"] = True
+
+        # Second pass: pick RX_ANT / PKT stats out of the new video lines
+        for record in parse_wfb_stats(w_batch):
+            if record[0] == "RX_ANT":
+                _, freqchan, wlan_id_hex, avg_rssi = record
+                line_no = len(wfb_rxant_current) + 1
+                wfb_rxant_current.append((freqchan, wlan_id_hex, line_no, avg_rssi))
 
-            if kind == "status":
-                status_logs.append(text)
-                if len(status_logs) > 1000:
-                    status_logs.pop(0)
-
-            elif kind == "wfb":
-                wfb_logs.append(text)
-                if len(wfb_logs) > 1000:
-                    wfb_logs.pop(0)
-
-                parts = text.split()
-                if len(parts) >= 4 and parts[0] == "RX_ANT":
-                    # e.g.: RX_ANT 5805:3:20 7f00000100000001 664:-57:-53:-50:...
-                    freqchan = parts[1]
-                    wlan_id_hex = parts[2]
-                    chunk = parts[3].split(':')
-
-                    avg_rssi = -9999.0
-                    if len(chunk) >= 3:
-                        try:
-                            avg_rssi = float(chunk[2])
-                        except ValueError:
-                            avg_rssi = -9999.0
-
-                    rxant_line_counter += 1
-                    # unique composite key
-                    composite_key = f"{freqchan}_{wlan_id_hex}_{rxant_line_counter}"
-                    wfb_rxant_dict_current[composite_key] = avg_rssi
-
-                elif len(parts) >= 2 and parts[0] == "PKT":
-                    # parse PKT
-                    try:
-                        pkt_fields = parts[1].split(":")
-                        if len(pkt_fields) == 9:
-                            p_all      = int(pkt_fields[0])
-                            b_all      = int(pkt_fields[1])
-                            p_dec_err  = int(pkt_fields[2])
-                            p_dec_ok   = int(pkt_fields[3])
-                            fec_rec    = int(pkt_fields[4])
-                            p_lost     = int(pkt_fields[5])
-                            p_bad      = int(pkt_fields[6])
-                            p_outgoing = int(pkt_fields[7])
-                            b_outgoing = int(pkt_fields[8])
-
-                            last_pkt_data["fec_rec"] = fec_rec
-                            last_pkt_data["p_lost"]  = p_lost
-                            last_pkt_data["b_all"]   = b_all
-                            last_pkt_data["b_out"]   = b_outgoing
-
-                            interval_s = float(log_interval_ms) / 1000.0
-                            if interval_s > 0:
-                                bitrate_all = (b_all * 8.0) / interval_s / 1e6
-                                bitrate_out = (b_outgoing * 8.0) / interval_s / 1e6
-                    except ValueError:
-                        pass
-
-                    # end chunk => move to display
-                    wfb_rxant_dict_display = dict(wfb_rxant_dict_current)
-                    wfb_rxant_dict_current.clear()
-                    rxant_line_counter = 0
-
-            elif kind == "tunnel":
-                tunnel_logs.append(text)
-                if len(tunnel_logs) > 1000:
-                    tunnel_logs.pop(0)
-
-        # Redraw status window
-        status_win.erase()
-        status_win.border()
-        leftover_status_lines = MAX_STATUS_LINES - 1 - len(status_header)
-        row = 1
-        for hl in status_header:
-            if row >= MAX_STATUS_LINES:
-                break
-            status_win.addstr(row, 1, hl)
-            row += 1
-        slice_status = status_logs[-leftover_status_lines:] if leftover_status_lines > 0 else []
-        for line in slice_status:
-            if row >= MAX_STATUS_LINES:
-                break
-            status_win.addstr(row, 1, line)
-            row += 1
-        status_win.refresh()
-
-        # Redraw stats window
-        stats_win.erase()
-        stats_win.border()
-        leftover_stats_lines = MAX_STATS_LINES - 1
-        row = 1
-
-        # Chart header
-        for hl in stats_header:
-            if row >= MAX_STATS_LINES:
-                break
-            stats_win.addstr(row, 1, hl)
-            row += 1
-            leftover_stats_lines -= 1
-
-        # Build RSSI lines from wfb_rxant_dict_display
-        rssi_items = build_rssi_chart_items(
-            wfb_rxant_dict_display,
-            rssi_min,
-            rssi_max,
-            bar_count,
-            color_pairs
-        )
-        for (line_str, color_attr) in rssi_items:
-            if leftover_stats_lines <= 0:
-                break
-            stats_win.addstr(row, 1, line_str, color_attr)
-            row += 1
-            leftover_stats_lines -= 1
-
-        # FEC Rec bar
-        if leftover_stats_lines > 0:
-            fec_val = last_pkt_data["fec_rec"]
-            fec_bar = generate_ascii_bar(fec_val, fec_rec_min, fec_rec_max, bar_count)
-            line_str = f"FEC Rec: {fec_val} | {fec_bar}"
-            stats_win.addstr(row, 1, line_str, color_pairs["magenta"])
-            row += 1
-            leftover_stats_lines -= 1
-
-        # Lost bar
-        if leftover_stats_lines > 0:
-            lost_val = last_pkt_data["p_lost"]
-            lost_bar = generate_ascii_bar(lost_val, p_lost_min, p_lost_max, bar_count)
-            line_str = f"Lost   : {lost_val} | {lost_bar}"
-            stats_win.addstr(row, 1, line_str, color_pairs["red"])
-            row += 1
-            leftover_stats_lines -= 1
-
-        # Throughput lines
-        if leftover_stats_lines > 0:
-            stats_win.addstr(row, 1, f"All: {bitrate_all:.2f} mbit/s")
-            row += 1
-            leftover_stats_lines -= 1
-
-        if leftover_stats_lines > 0:
-            stats_win.addstr(row, 1, f"Data out: {bitrate_out:.2f} mbit/s")
-            row += 1
-            leftover_stats_lines -= 1
-
-        stats_win.refresh()
-
-        # Bottom-left: wfb logs
-        draw_window(wfb_win, wfb_header_lines, wfb_logs, bottom_height, wfb_width)
-        # Bottom-right: tunnel logs
-        draw_window(tunnel_win, tunnel_header_lines, tunnel_logs, bottom_height, tunnel_width)
-
-        if not alive_threads and event_queue.empty():
+            else:
+                pkt = record[1]
+                if pkt is not None:
+                    b_all, fec_rec, p_lost, b_outgoing = pkt
+
+                    last_pkt_data["fec_rec"] = fec_rec
+                    last_pkt_data["p_lost"]  = p_lost
+                    last_pkt_data["b_all"]   = b_all
+                    last_pkt_data["b_out"]   = b_outgoing
+
+                    interval_s = float(cfg.log_interval) / 1000.0
+                    if interval_s > 0:
+                        bitrate_all = (b_all * 8.0) / interval_s / 1e6
+                        bitrate_out = (b_outgoing * 8.0) / interval_s / 1e6
+
+                # end chunk => move to display
+                wfb_rxant_display = wfb_rxant_current
+                wfb_rxant_current = []
+                dirty["stats"] = True
+
+        # Redraw at most once per FRAME_INTERVAL; a burst of lines in
+        # between just leaves the panes dirty for the next frame.
+        now = time.monotonic()
+        if any(dirty.values()) and now >= next_frame:
+            next_frame = now + FRAME_INTERVAL
+
+            # Redraw status window
+            if dirty["status"]:
+                draw_log(panes["status"], status_logs, format_status)
+                dirty["status"] = False
+
+            # Redraw stats window
+            if dirty["stats"]:
+                pane = panes["stats"]
+
+                # Build RSSI lines from wfb_rxant_display
+                # Only as many rows as fit below the chart header
+                rows = build_rssi_chart_items(
+                    wfb_rxant_display,
+                    cfg.rssi_min,
+                    cfg.rssi_max,
+                    cfg.bar_count,
+                    color_pairs,
+                    max(0, pane["height"] - 2 - len(pane["header"])),
+                    rssi_colors
+                )
+
+                # FEC Rec bar
+                fec_val = last_pkt_data["fec_rec"]
+                fec_bar = generate_ascii_bar(fec_val, cfg.fec_rec_min, cfg.fec_rec_max, cfg.bar_count)
+                rows.append((f"FEC Rec: {fec_val} | {fec_bar}", color_pairs["magenta"]))
+
+                # Lost bar
+                lost_val = last_pkt_data["p_lost"]
+                lost_bar = generate_ascii_bar(lost_val, cfg.p_lost_min, cfg.p_lost_max, cfg.bar_count)
+                rows.append((f"Lost   : {lost_val} | {lost_bar}", color_pairs["red"]))
+
+                # Throughput lines
+                rows.append((format_mbit("All", round(bitrate_all, 2)), 0))
+                rows.append((format_mbit("Data out", round(bitrate_out, 2)), 0))
+
+                draw_rows(pane["win"], rows, pane["prev_rows"], pane["height"], pane["width"],
+                          len(pane["header"]))
+                dirty["stats"] = False
+
+            # Bottom-left: wfb logs
+            if dirty["wfb"]:
+                draw_log(panes["wfb"], wfb_logs)
+                dirty["wfb"] = False
+            # Bottom-right: tunnel logs
+            if dirty["tunnel"]:
+                draw_log(panes["tunnel"], tunnel_logs)
+                dirty["tunnel"] = False
+
+
+            # One terminal write for every pane touched this frame
+            curses.doupdate()
+
+        if not alive_threads and not streams_open(sel) and not event_queue:
             break
 
-        time.sleep(0.1)
-
     # Final cleanup
-    event_queue.put(("status", "[INFO] Executing final cleanup..."))
+    event_queue.put((STATUS, None, "[INFO] Executing final cleanup..."))
     try:
         subprocess.run(["./final_cleanup.sh"], check=False)
-        event_queue.put(("status", "[INFO] Final cleanup completed."))
+        event_queue.put((STATUS, None, "[INFO] Final cleanup completed."))
     except Exception as e:
-        event_queue.put(("status", f"[ERROR] Could not complete final cleanup: {e}"))
+        event_queue.put((STATUS, None, f"[ERROR] Could not complete final cleanup: {e}"))
 
     if CTRL_C_TRIGGERED:
         return
@@ -1036,16 +1128,13 @@ def ncurses_main(stdscr):
 # --------------------------------------------------------------------------
 
 def main():
-    import configparser
-    config = configparser.ConfigParser()
-    config.read("config.cfg")
-    daemon_str = config.get("common", "daemon", fallback="false").strip().lower()
-    daemon_mode = (daemon_str == "true")
+    # config.cfg is read once here and handed to whichever mode runs
+    cfg = load_config()
 
-    if daemon_mode:
-        daemon_main()
+    if cfg.daemon:
+        daemon_main(cfg)
     else:
-        curses.wrapper(ncurses_main)
+        curses.wrapper(ncurses_main, cfg)
 
 if __name__ == "__main__":
     main()
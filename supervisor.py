@@ -1,151 +1,378 @@
 #!/usr/bin/python3
+import configparser
+import logging
 import os
+import selectors
+import shutil
 import signal
 import subprocess
 import sys
+import threading
 import time
+from dataclasses import dataclass, field
+from typing import Optional
 
-# Global variables to store process objects
-menu_process = None
-steam_wfb_process = None
-fpv_process = None
-shutdown_triggered = False
+# The helper scripts live next to this file. Resolve them once so a
+# change of working directory can't break the launches. (config.cfg and
+# the key files stay relative to the working directory, as they are for
+# menu_selector.py and steam_wfb.py.)
+BASE = os.path.dirname(os.path.realpath(__file__))
+MENU_SELECTOR = os.path.join(BASE, "menu_selector.py")
+STEAM_WFB = os.path.join(BASE, "steam_wfb.py")
+FPV_SCRIPT = os.path.join(BASE, "fpv.sh")
+KEYPAIR_GS = os.path.join(BASE, "keypair_gs")
+FINAL_CLEANUP_SCRIPT = os.path.join(BASE, "final_cleanup.sh")
 
-# Path to the final cleanup script
-FINAL_CLEANUP_SCRIPT = "./final_cleanup.sh"
+# How long to leave the menu up before giving up on it and carrying on
+# with the saved config. Set SUPERVISOR_MENU_TIMEOUT=0 to wait forever.
+MENU_TIMEOUT = float(os.environ.get("SUPERVISOR_MENU_TIMEOUT", "600")) or None
 
-# Cleanup function
-def cleanup():
-    global menu_process, steam_wfb_process, fpv_process, shutdown_triggered
-    if shutdown_triggered:
-        return  # Prevent recursive cleanup
-    shutdown_triggered = True
+# Look konsole up on PATH once instead of on every launch
+KONSOLE = shutil.which("konsole") or "/usr/bin/konsole"
 
-    print("Cleaning up all processes...")
+# Keys read from the [common] section of config.cfg, with their defaults
+CONFIG_DEFAULTS = {
+    "gst_pipeline": "video",
+    "video_key_path": "",
+    "tunnel_key_path": "",
+    "wfb_video_passphrase": "",
+    "wfb_tunnel_passphrase": "",
+}
 
-    # Run final_cleanup.sh (to ensure steam_wfb.py cleanup happens)
-    if os.path.exists(FINAL_CLEANUP_SCRIPT):
-        print("Running final_cleanup.sh...")
+# Parsed configs, keyed by (path, mtime_ns, size)
+_CONFIG_CACHE = {}
+
+# Signals the fallback monitor loop waits for
+MONITOR_SIGNALS = {signal.SIGCHLD, signal.SIGINT, signal.SIGTERM}
+
+# Read config.cfg, reusing the last parse while the file is unchanged.
+# The file is small, so it's read with plain os.read() calls, and with
+# O_NOATIME so that reading it doesn't dirty its inode.
+def load_config(path):
+    try:
         try:
-            subprocess.run([FINAL_CLEANUP_SCRIPT], check=False)
+            fd = os.open(path, os.O_RDONLY | getattr(os, "O_NOATIME", 0))
+        except PermissionError:
+            # O_NOATIME is only allowed on files we own
+            fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return dict(CONFIG_DEFAULTS)
+
+    try:
+        st = os.fstat(fd)
+        cache_key = (path, st.st_mtime_ns, st.st_size)
+        config = _CONFIG_CACHE.get(cache_key)
+        if config is not None:
+            return config
+
+        data = b""
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            data += chunk
+    finally:
+        os.close(fd)
+
+    # No interpolation: a '%' in a passphrase is just a character
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.read_string(data.decode("utf-8"), source=path)
+
+    config = {key: parser.get("common", key, fallback=default)
+              for key, default in CONFIG_DEFAULTS.items()}
+    _CONFIG_CACHE[cache_key] = config
+    return config
+
+# Start a short-lived helper and return its pid. posix_spawn() lets libc
+# use vfork/CLONE_VM instead of copying our page tables the way fork()
+# does. SIGPIPE/SIGXFSZ are reset because Python ignores them and exec
+# keeps ignored dispositions, and the signal mask is cleared since
+# cleanup() runs with signals blocked.
+def spawn(argv):
+    return os.posix_spawn(argv[0], argv, os.environ, setsigmask=(),
+                          setsigdef=(signal.SIGPIPE, signal.SIGXFSZ))
+
+# Signal the process group a child leads. The group is gone once every
+# member has exited, and sudo'ed members may refuse us; both are fine.
+def signal_group(process, signum):
+    try:
+        os.killpg(process.pid, signum)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+# Supervisor state: the processes it started and the shutdown guard
+@dataclass
+class Supervisor:
+    menu: Optional[subprocess.Popen] = None
+    steam_wfb: Optional[subprocess.Popen] = None
+    fpv: Optional[subprocess.Popen] = None
+    wakeup_fd: Optional[int] = None
+    cleanup_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    # Cleanup function
+    def cleanup(self):
+        # Prevent recursive cleanup. Unlike testing and then setting a flag,
+        # the acquire can't be split by a signal handler running in between.
+        if not self.cleanup_lock.acquire(blocking=False):
+            return
+
+        # Hold off further signals so the teardown isn't cut short; they
+        # stay pending and die with us
+        signal.pthread_sigmask(signal.SIG_BLOCK, MONITOR_SIGNALS)
+
+        print("Cleaning up all processes...")
+
+        # Run final_cleanup.sh (to ensure steam_wfb.py cleanup happens)
+        # No exists() check first: the spawn fails fast if it's missing
+        try:
+            pid = spawn([FINAL_CLEANUP_SCRIPT])
+        except FileNotFoundError:
+            pass
         except Exception as e:
             print(f"Error running {FINAL_CLEANUP_SCRIPT}: {e}")
+        else:
+            print("Running final_cleanup.sh...")
+            os.waitpid(pid, 0)
+
+        # Close the menu if we're interrupted while it's still up
+        if self.menu and self.menu.poll() is None:
+            signal_group(self.menu, signal.SIGTERM)
+
+        # Terminate fpv.sh and steam_wfb.py. Each child leads its own
+        # process group, so this also reaches the pipelines it started,
+        # even if the child itself is already gone.
+        targets = [(process, name) for process, name in
+                   ((self.fpv, "fpv.sh"), (self.steam_wfb, "steam_wfb.py"))
+                   if process]
+        for process, name in targets:
+            if process.poll() is None:
+                print(f"Sending SIGTERM to {name}...")
+            signal_group(process, signal.SIGTERM)
+
+        # Both got the signal at once, so they share one 5 second grace period
+        deadline = time.monotonic() + 5
+        for process, name in targets:
+            try:
+                process.wait(timeout=max(0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                print(f"Force killing {name}...")
+                signal_group(process, signal.SIGKILL)
 
-    # Terminate fpv.sh
-    if fpv_process and fpv_process.poll() is None:
-        print("Sending SIGTERM to fpv.sh...")
-        fpv_process.terminate()
+        print("Cleanup complete.")
+        sys.exit(0)
+
+    # Signal handlers
+    def signal_handler(self, signum, frame):
+        print(f"Received signal: {signum}")
+        self.cleanup()
+
+    # Have the C-level signal handler also write to a pipe that our
+    # selectors watch. A signal landing just before select() blocks would
+    # otherwise only get its Python handler run once select() returned for
+    # some other reason.
+    def set_up_wakeup(self):
+        self.wakeup_fd, w = os.pipe()
+        os.set_blocking(self.wakeup_fd, False)
+        os.set_blocking(w, False)
+        signal.set_wakeup_fd(w)
+
+    def watch_wakeup(self, sel):
+        if self.wakeup_fd is not None:
+            sel.register(self.wakeup_fd, selectors.EVENT_READ)
+
+    # The handler itself has done the work by now; just empty the pipe
+    def drain_wakeup(self):
         try:
-            fpv_process.wait(timeout=5)
-        except subprocess.TimeoutExpired:
-            print("Force killing fpv.sh...")
-            fpv_process.kill()
-
-    # Terminate steam_wfb.py
-    if steam_wfb_process and steam_wfb_process.poll() is None:
-        print("Sending SIGTERM to steam_wfb.py...")
-        steam_wfb_process.terminate()
+            while os.read(self.wakeup_fd, 512):
+                pass
+        except BlockingIOError:
+            pass
+
+    # Wait up to 'timeout' seconds (None: forever) for a child to exit and
+    # reap it. Returns False on timeout. Sleeps on the child's pidfd where
+    # there is one; SIGINT/SIGTERM still interrupt the wait and run their
+    # handlers.
+    def wait_exit(self, process, timeout):
         try:
-            steam_wfb_process.wait(timeout=5)
-        except subprocess.TimeoutExpired:
-            print("Force killing steam_wfb.py...")
-            steam_wfb_process.kill()
+            pidfd = os.pidfd_open(process.pid)
+        except (AttributeError, OSError):
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                return False
+            return True
 
-    print("Cleanup complete.")
-    sys.exit(0)
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+        try:
+            with selectors.DefaultSelector() as sel:
+                sel.register(pidfd, selectors.EVENT_READ)
+                self.watch_wakeup(sel)
+                while True:
+                    if timeout is not None:
+                        timeout = max(0, deadline - time.monotonic())
+                    events = sel.select(timeout)
+                    if not events:
+                        return False
+                    if any(key.fd == pidfd for key, _ in events):
+                        break
+                    self.drain_wakeup()
+        finally:
+            os.close(pidfd)
+        process.wait()
+        return True
 
-# Signal handlers
-def signal_handler(signum, frame):
-    print(f"Received signal: {signum}")
-    cleanup()
+    # Called when a monitored child goes away on its own
+    def child_exited(self, process, name):
+        process.wait()
+        print(f"{name} has exited unexpectedly. Triggering cleanup...")
+        self.cleanup()
 
-# Main function
-def main():
-    global menu_process, steam_wfb_process, fpv_process
-
-    # Register signal handlers
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-
-    # Launch menu_selector.py
-    print("Launching menu_selector.py...")
-    menu_process = subprocess.Popen(
-        ["konsole", "--qwindowgeometry", "1280x800", "-e", "./menu_selector.py"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
-    )
-    menu_process.wait()  # Wait for menu_selector.py to complete
-
-    # Read the updated config
-    config_file = "config.cfg"
-    gst_pipeline = "video"  # Default pipeline
-    video_key_path = ""
-    tunnel_key_path = ""
-    wfb_video_passphrase = ""
-    wfb_tunnel_passphrase = ""
-
-    if os.path.exists(config_file):
-        with open(config_file, "r") as f:
-            for line in f:
-                key, _, value = line.partition("=")
-                if key.strip() == "gst_pipeline":
-                    gst_pipeline = value.strip()
-                elif key.strip() == "video_key_path":
-                    video_key_path = value.strip()
-                elif key.strip() == "tunnel_key_path":
-                    tunnel_key_path = value.strip()
-                elif key.strip() == "wfb_video_passphrase":
-                    wfb_video_passphrase = value.strip()
-                elif key.strip() == "wfb_tunnel_passphrase":
-                    wfb_tunnel_passphrase = value.strip()
-
-    print(f"DEBUG: gst_pipeline={gst_pipeline}")
-    print(f"DEBUG: video_key_path={video_key_path}, tunnel_key_path={tunnel_key_path}")
-    print(f"DEBUG: wfb_video_passphrase={wfb_video_passphrase}, wfb_tunnel_passphrase={wfb_tunnel_passphrase}")
-
-    # Execute keypair_gs if passphrases are provided
-    if wfb_video_passphrase:
-        print(f"Executing keypair_gs for video...")
-        subprocess.run(["./keypair_gs", wfb_video_passphrase, video_key_path], check=False)
-
-    if wfb_tunnel_passphrase:
-        print(f"Executing keypair_gs for tunnel...")
-        subprocess.run(["./keypair_gs", wfb_tunnel_passphrase, tunnel_key_path], check=False)
-
-    # Determine whether to start steam_wfb.py
-    if video_key_path or tunnel_key_path:
-        print("Launching steam_wfb.py...")
-        steam_wfb_process = subprocess.Popen(
-            ["konsole", "--qwindowgeometry", "1280x800", "-e", "sudo ./steam_wfb.py"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
+    # Monitor processes through pidfds: each becomes readable once its
+    # child exits, so we sleep in epoll until then. SIGINT/SIGTERM
+    # interrupt the select() and run their handlers as usual.
+    def monitor_pidfds(self, children):
+        sel = selectors.DefaultSelector()
+        try:
+            for process, name in children:
+                sel.register(os.pidfd_open(process.pid), selectors.EVENT_READ, (process, name))
+        except (AttributeError, OSError):
+            # No pidfd_open (Python < 3.9 or kernel < 5.3)
+            for key in sel.get_map().values():
+                os.close(key.fd)
+            sel.close()
+            self.monitor_sigwait(children)
+            return
+        self.watch_wakeup(sel)
 
-    # Launch fpv.sh
-    print("Launching fpv.sh...")
-    fpv_process = subprocess.Popen(
-        ["./fpv.sh", gst_pipeline],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
-    )
+        while True:
+            for key, _ in sel.select():
+                if key.fd == self.wakeup_fd:
+                    self.drain_wakeup()
+                else:
+                    self.child_exited(*key.data)
 
-    # Monitor processes
-    try:
+    # Fallback monitor. Blocking the signals (after the children are
+    # started, so they don't inherit the mask) makes them queue up for
+    # sigwait(); a child that dies before we get there leaves SIGCHLD
+    # pending, so nothing is missed. waitid() names whichever child
+    # exited; WNOWAIT leaves the zombie for its Popen to reap.
+    def monitor_sigwait(self, children):
+        by_pid = {process.pid: (process, name) for process, name in children}
+        signal.pthread_sigmask(signal.SIG_BLOCK, MONITOR_SIGNALS)
         while True:
-            # Check if fpv.sh exited unexpectedly
-            if fpv_process.poll() is not None:
-                print("fpv.sh has exited unexpectedly. Triggering cleanup...")
-                cleanup()
+            info = os.waitid(os.P_ALL, 0, os.WEXITED | os.WNOHANG | os.WNOWAIT)
+            if info is not None:
+                child = by_pid.get(info.si_pid)
+                if child:
+                    self.child_exited(*child)
+                os.waitpid(info.si_pid, 0)  # not one of ours
+                continue
+
+            # Sleep in the kernel until a child exits or we're told to stop
+            signum = signal.sigwait(MONITOR_SIGNALS)
+            if signum != signal.SIGCHLD:
+                self.signal_handler(signum, None)
+
+    # Show the menu, then start steam_wfb.py and fpv.sh from the config
+    # it saved
+    def start(self):
+        # Launch menu_selector.py
+        print("Launching menu_selector.py...")
+        self.menu = subprocess.Popen(
+            ["konsole", "--qwindowgeometry", "1280x800", "-e", MENU_SELECTOR],
+            executable=KONSOLE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+        # Wait for menu_selector.py to complete
+        if not self.wait_exit(self.menu, MENU_TIMEOUT):
+            print("menu_selector.py timed out, closing it...")
+            signal_group(self.menu, signal.SIGTERM)
+            if not self.wait_exit(self.menu, 5):
+                signal_group(self.menu, signal.SIGKILL)
+                self.menu.wait()
+
+        # Read the updated config
+        config = load_config("config.cfg")
+
+        gst_pipeline = config["gst_pipeline"]
+        video_key_path = config["video_key_path"]
+        tunnel_key_path = config["tunnel_key_path"]
+        wfb_video_passphrase = config["wfb_video_passphrase"]
+        wfb_tunnel_passphrase = config["wfb_tunnel_passphrase"]
+
+        # Only say whether the passphrases are set, never what they are
+        logging.debug("gst_pipeline=%s", gst_pipeline)
+        logging.debug("video_key_path=%s, tunnel_key_path=%s", video_key_path, tunnel_key_path)
+        logging.debug("wfb_video_passphrase set: %s, wfb_tunnel_passphrase set: %s",
+                      bool(wfb_video_passphrase), bool(wfb_tunnel_passphrase))
+
+        # Execute keypair_gs if passphrases are provided. The two runs write
+        # different keys, so start both and then wait for both.
+        keypair_pids = []
+        if wfb_video_passphrase:
+            print("Executing keypair_gs for video...")
+            keypair_pids.append(spawn([KEYPAIR_GS, wfb_video_passphrase, video_key_path]))
 
-            # Check if steam_wfb.py exited unexpectedly
-            if steam_wfb_process and steam_wfb_process.poll() is not None:
-                print("steam_wfb.py has exited unexpectedly. Triggering cleanup...")
-                cleanup()
+        if wfb_tunnel_passphrase:
+            # Unless both point at the same file, then the tunnel key wins
+            if tunnel_key_path == video_key_path:
+                for pid in keypair_pids:
+                    os.waitpid(pid, 0)
+                keypair_pids = []
+            print("Executing keypair_gs for tunnel...")
+            keypair_pids.append(spawn([KEYPAIR_GS, wfb_tunnel_passphrase, tunnel_key_path]))
 
-            time.sleep(1)  # Sleep briefly to avoid high CPU usage
-    except KeyboardInterrupt:
-        cleanup()
+        for pid in keypair_pids:
+            os.waitpid(pid, 0)
+
+        # Determine whether to start steam_wfb.py
+        if video_key_path or tunnel_key_path:
+            print("Launching steam_wfb.py...")
+            self.steam_wfb = subprocess.Popen(
+                ["konsole", "--qwindowgeometry", "1280x800", "-e", "sudo", STEAM_WFB],
+                executable=KONSOLE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True
+            )
+
+        # Launch fpv.sh
+        print("Launching fpv.sh...")
+        self.fpv = subprocess.Popen(
+            [FPV_SCRIPT, gst_pipeline],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+
+    # Start everything, then watch it until something exits or we're told
+    # to stop
+    def run(self):
+        # Register signal handlers
+        signal.signal(signal.SIGINT, self.signal_handler)
+        signal.signal(signal.SIGTERM, self.signal_handler)
+        self.set_up_wakeup()
+
+        self.start()
+
+        children = [(self.fpv, "fpv.sh")]
+        if self.steam_wfb:
+            children.append((self.steam_wfb, "steam_wfb.py"))
+
+        try:
+            self.monitor_pidfds(children)
+        except KeyboardInterrupt:
+            self.cleanup()
+
+# Main function
+def main():
+    # Debug output is opt-in through SUPERVISOR_DEBUG
+    logging.basicConfig(level=logging.DEBUG if os.environ.get("SUPERVISOR_DEBUG") else logging.INFO)
+
+    Supervisor().run()
 
 if __name__ == "__main__":
     main()
-